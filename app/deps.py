@@ -1,12 +1,11 @@
 from typing import Optional, Callable
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import jwt, JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_db
 from app.models.user import User
-from app.services.auth_service import get_secret_key
+from app.services.auth_service import TokenError, decode_token
 
 
 security_scheme = HTTPBearer(auto_error=False)
@@ -20,9 +19,9 @@ async def get_current_user(
         raise HTTPException(status_code=401, detail="Not authenticated")
     token = credentials.credentials
     try:
-        payload = jwt.decode(token, get_secret_key(), algorithms=["HS256"])
+        payload = decode_token(token)
         user_id = int(payload.get("sub", "0"))
-    except JWTError:
+    except TokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
     user = await db.get(User, user_id)
     if not user:
@@ -31,8 +30,10 @@ async def get_current_user(
 
 
 def require_role(*allowed_roles: str) -> Callable[[User], User]:
+    allowed = frozenset(allowed_roles)
+
     async def checker(user: User = Depends(get_current_user)) -> User:
-        if user.role not in allowed_roles:
+        if user.role not in allowed:
             raise HTTPException(status_code=403, detail="Insufficient permissions")
         return user
     return checker
@@ -50,9 +51,9 @@ async def get_current_user_optional(
         return None
     token = credentials.credentials
     try:
-        payload = jwt.decode(token, get_secret_key(), algorithms=["HS256"])
+        payload = decode_token(token)
         user_id = int(payload.get("sub", "0"))
-    except JWTError:
+    except TokenError:
         return None
     user = await db.get(User, user_id)
     return user
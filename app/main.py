@@ -3,35 +3,59 @@ FastAPI application main entry point
 """
 from __future__ import annotations
 
+import asyncio
 import os
 import tempfile
-import threading
 import time
 import webbrowser
 from contextlib import asynccontextmanager
+from typing import Optional
 
 import socketio
-from fastapi import FastAPI, Response, Request
+from fastapi import FastAPI, HTTPException, Response, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+from fastapi.middleware.gzip import GZipMiddleware
 
-from app.db import AsyncSessionLocal, init_db
+from app.db import AsyncSessionLocal, init_db, warm_up_pool
 from app.logging_config import get_logger, setup_logging
 from app.middleware.logging import RequestLoggingMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.static_assets import AssetCache, StaticAssetMiddleware, asset_response, load_assets
 from app.routers import analytics, feedback, health
 from app.routers import auth as auth_router
-from app.services.auth_service import ensure_admin_user, ensure_or_update_admin_user, get_secret_key
+from app.services.auth_service import (
+    ensure_or_update_admin_user,
+    get_secret_key,
+    upsert_user,
+)
 from app.sockets.events import sio
 from app.utils.errors import APIError, api_error_handler, generic_error_handler
 
 logger = get_logger(__name__)
 
-# Rate limiting
-limiter = Limiter(key_func=get_remote_address)
+# Rate limiting (token bucket in Redis, shared across workers/replicas)
+REDIS_URL = os.getenv("REDIS_URL")
+RATE_LIMIT_CAPACITY = int(os.getenv("RATE_LIMIT_CAPACITY", "60"))
+RATE_LIMIT_REFILL_PER_SECOND = float(os.getenv("RATE_LIMIT_REFILL_PER_SECOND", "1.0"))
+# Set to 1 only behind a proxy that appends the client address to
+# X-Forwarded-For (Render); the limiter then keys on the rightmost entry.
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "0") == "1"
+
+frontend_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend")
+
+# Populated once at startup; the frontend directory is immutable at runtime
+# so files are served from memory.
+_frontend_cache: AssetCache = {}
+# Resolved once at import; routes below are registered based on what exists.
+FRONTEND_EXISTS = os.path.isdir(frontend_path)
+INDEX_PATH = os.path.join(frontend_path, "index.html")
+STAFF_PATH = os.path.join(frontend_path, "staff_login.html")
+FAVICON_PATH = os.path.join(frontend_path, "favicon.ico")
+_FRONTEND_ALIASES = {
+    "/": INDEX_PATH,
+    "/staff": STAFF_PATH,
+    "/favicon.ico": FAVICON_PATH,
+}
 
 
 def _validate_configuration() -> None:
@@ -51,6 +75,7 @@ async def lifespan(app: FastAPI):
     _validate_configuration()
 
     await init_db()
+    await warm_up_pool()
     logger.info("Database initialized")
 
     try:
@@ -58,52 +83,88 @@ async def lifespan(app: FastAPI):
         admin_password = os.getenv("ADMIN_PASSWORD")
         if admin_email and admin_password:
             async with AsyncSessionLocal() as seed_session:
-                # Smart admin management: create, update, or do nothing
-                user, status = await ensure_or_update_admin_user(
-                    seed_session, admin_email, admin_password, role="admin"
-                )
+                if os.getenv("ADMIN_FORCE_RESET") == "1":
+                    # Explicit opt-in: overwrite the admin's password and role
+                    user = await upsert_user(seed_session, admin_email, admin_password, role="admin")
+                    status = "reset"
+                else:
+                    # Smart admin management: create, update, or do nothing
+                    user, status = await ensure_or_update_admin_user(
+                        seed_session, admin_email, admin_password, role="admin"
+                    )
                 logger.info(f"Admin user {status}: {admin_email} (ID: {user.id})")
         else:
             logger.info("Admin bootstrap skipped - set ADMIN_EMAIL/ADMIN_PASSWORD to enable")
     except Exception as exc:  # pragma: no cover
         logger.exception("Admin bootstrap failed: %s", exc)
 
-    _maybe_open_browser()
+    _load_frontend_assets()
+
+    browser_task = None
+    if os.getenv("AUTO_OPEN_BROWSER", "0") == "1":
+        # Runs once startup has yielded, so it never delays readiness
+        browser_task = asyncio.create_task(_maybe_open_browser())
 
     yield
 
+    if browser_task is not None and not browser_task.done():
+        browser_task.cancel()
+
     logger.info("Application shutdown complete")
 
 
-def _maybe_open_browser() -> None:
-    if os.getenv("AUTO_OPEN_BROWSER", "0") != "1":
-        return
+def _claim_browser_lock() -> bool:
+    """Return True unless another reload opened the browser in the last 2 minutes."""
     lock_path = os.path.join(tempfile.gettempdir(), "mfap_browser_open.lock")
-    should_open = True
     if os.path.exists(lock_path):
         last_mtime = os.path.getmtime(lock_path)
         if (time.time() - last_mtime) < 120:
-            should_open = False
-    if should_open:
-        with open(lock_path, "w", encoding="utf-8") as lock_file:
-            lock_file.write(str(time.time()))
-        port = os.getenv("PORT", "8000")
-        url = f"http://localhost:{port}/"
-        threading.Timer(1.0, lambda: webbrowser.open(url)).start()
-        logger.info("Opening browser at %s", url)
+            return False
+    with open(lock_path, "w", encoding="utf-8") as lock_file:
+        lock_file.write(str(time.time()))
+    return True
+
+
+async def _maybe_open_browser() -> None:
+    if not await asyncio.to_thread(_claim_browser_lock):
+        return
+    port = os.getenv("PORT", "8000")
+    url = f"http://localhost:{port}/"
+    await asyncio.sleep(1.0)
+    logger.info("Opening browser at %s", url)
+    await asyncio.to_thread(webbrowser.open, url)
 
 
+def _load_frontend_assets() -> None:
+    """Read every frontend file into memory with precomputed headers."""
+    _frontend_cache.clear()
+    if not FRONTEND_EXISTS:
+        return
+    _frontend_cache.update(load_assets(frontend_path, _FRONTEND_ALIASES))
+    logger.info("Cached %d frontend assets in memory", len(_frontend_cache))
+
+
+def _cached_asset_response(request: Request, url_path: str) -> Optional[Response]:
+    """Route-level fallback when the app is served without StaticAssetMiddleware."""
+    return asset_response(_frontend_cache, url_path, request.headers)
+
+
+# Single exception-handler table, keyed by exception class. Starlette resolves
+# handlers by walking the exception's MRO against this dict, so subclasses of
+# APIError are still routed to api_error_handler.
+EXCEPTION_HANDLERS = {
+    APIError: api_error_handler,
+    Exception: generic_error_handler,
+}
+
 app = FastAPI(
     title="Medical Feedback Analysis Platform",
     description="Backend API for analyzing medical feedback using Gemini AI",
     version="1.0.0",
     lifespan=lifespan,
+    exception_handlers=EXCEPTION_HANDLERS,
 )
 
-# Setup rate limiter
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 # CORS configuration - allow specific origins
 allowed_origins = [
     "http://localhost:8000",
@@ -117,9 +178,26 @@ allowed_origins = [
 if os.getenv("ENVIRONMENT", "production").lower() == "development":
     allowed_origins.append("*")
 
-# Add middlewares (order matters - add logging first, then CORS)
+# Add middlewares (order matters - rate limiting, logging, gzip, then CORS).
+# Starlette wraps later-added middleware around earlier ones, so CORS is the
+# outermost layer: preflight OPTIONS requests are answered there and never
+# reach logging, rate limiting, or route dependencies.
+if REDIS_URL:
+    app.add_middleware(
+        RateLimitMiddleware,
+        redis_url=REDIS_URL,
+        capacity=RATE_LIMIT_CAPACITY,
+        refill_per_second=RATE_LIMIT_REFILL_PER_SECOND,
+        trust_forwarded_for=RATE_LIMIT_TRUST_PROXY,
+    )
+else:
+    logger.info("Rate limiting disabled - set REDIS_URL to enable")
+
 app.add_middleware(RequestLoggingMiddleware)
 
+# Compress JSON (analytics time series) and frontend assets above 500 bytes
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -128,42 +206,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.add_exception_handler(APIError, api_error_handler)
-app.add_exception_handler(Exception, generic_error_handler)
-
 app.include_router(feedback.router)
 app.include_router(analytics.router)
 app.include_router(auth_router.router)
 app.include_router(health.router)
 
-frontend_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend")
-if os.path.exists(frontend_path):
-    app.mount("/static", StaticFiles(directory=frontend_path), name="static")
+if FRONTEND_EXISTS:
 
-    @app.get("/staff", include_in_schema=False)
-    async def serve_staff_login():
-        staff_path = os.path.join(frontend_path, "staff_login.html")
-        if os.path.exists(staff_path):
-            return FileResponse(staff_path)
-        return {"message": "Staff login page not found"}
+    @app.get("/static/{asset_path:path}", include_in_schema=False)
+    async def serve_static(asset_path: str, request: Request):
+        response = _cached_asset_response(request, f"/static/{asset_path}")
+        if response is None:
+            raise HTTPException(status_code=404, detail="Not Found")
+        return response
 
-    @app.get("/", include_in_schema=False)
-    async def serve_frontend():
-        index_path = os.path.join(frontend_path, "index.html")
-        if os.path.exists(index_path):
-            return FileResponse(index_path)
-        return {
-            "message": "Medical Feedback Analysis Platform API",
-            "version": "1.0.0",
-            "docs": "/docs",
-        }
+    if os.path.isfile(STAFF_PATH):
+
+        @app.get("/staff", include_in_schema=False)
+        async def serve_staff_login(request: Request):
+            return _cached_asset_response(request, "/staff")
+    else:
+
+        @app.get("/staff", include_in_schema=False)
+        async def serve_staff_login():
+            return {"message": "Staff login page not found"}
+
+    if os.path.isfile(FAVICON_PATH):
+
+        @app.get("/favicon.ico", include_in_schema=False)
+        async def serve_favicon(request: Request):
+            return _cached_asset_response(request, "/favicon.ico")
+    else:
 
-    @app.get("/favicon.ico", include_in_schema=False)
-    async def serve_favicon():
-        icon_path = os.path.join(frontend_path, "favicon.ico")
-        if os.path.exists(icon_path):
-            return FileResponse(icon_path)
-        return Response(status_code=204)
+        @app.get("/favicon.ico", include_in_schema=False)
+        async def serve_favicon():
+            return Response(status_code=204)
+
+
+if FRONTEND_EXISTS and os.path.isfile(INDEX_PATH):
+
+    @app.get("/", include_in_schema=False)
+    async def serve_frontend(request: Request):
+        return _cached_asset_response(request, "/")
 else:
 
     @app.get("/")
@@ -175,7 +259,9 @@ else:
         }
 
 
-asgi_app = socketio.ASGIApp(sio, app)
+# Static assets are answered before the FastAPI middleware stack; everything
+# else (including lifespan) falls through to the app.
+asgi_app = socketio.ASGIApp(sio, StaticAssetMiddleware(app, _frontend_cache))
 
 __all__ = ["app", "asgi_app"]
 
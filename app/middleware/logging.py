@@ -4,38 +4,60 @@ HTTP request/response logging middleware.
 from __future__ import annotations
 
 import time
-from typing import Callable
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.logging_config import get_logger
 
 logger = get_logger(__name__)
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Log every incoming request with execution time and status."""
+class RequestLoggingMiddleware:
+    """Log every incoming request with execution time and status.
+
+    Implemented as plain ASGI rather than ``BaseHTTPMiddleware`` so requests
+    are not wrapped in extra Request/Response objects and a task group.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
         start_time = time.perf_counter()
+        method = scope["method"]
+        path = scope["path"]
+        client = scope.get("client")
         logger.info(
             "→ %s %s",
-            request.method,
-            request.url.path,
-            extra={"client": request.client.host if request.client else None},
+            method,
+            path,
+            extra={"client": client[0] if client else None},
         )
 
-        response = await call_next(request)
-        duration_ms = (time.perf_counter() - start_time) * 1000
-        logger.info(
-            "← %s %s %s (%.2f ms)",
-            request.method,
-            request.url.path,
-            response.status_code,
-            duration_ms,
-        )
-        response.headers["X-Process-Time"] = f"{duration_ms:.2f}ms"
-        return response
-
-
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                duration_ms = (time.perf_counter() - start_time) * 1000
+                headers = MutableHeaders(scope=message)
+                headers["X-Process-Time"] = f"{duration_ms:.2f}ms"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - start_time) * 1000
+            logger.info(
+                "← %s %s %s (%.2f ms)",
+                method,
+                path,
+                status_code,
+                duration_ms,
+            )
@@ -0,0 +1,130 @@
+"""
+Distributed token-bucket rate limiting backed by Redis.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+import redis.asyncio as redis
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.logging_config import get_logger
+from app.utils.errors import RateLimitError, error_response
+
+logger = get_logger(__name__)
+
+# Redis must answer fast or not at all: a stalled or blackholed server would
+# otherwise hold every request until the OS TCP timeout instead of failing open.
+REDIS_TIMEOUT_SECONDS = 0.25
+
+# Refill, take one token and persist the bucket in a single atomic round trip.
+# Returns {allowed (0/1), retry_after_seconds}.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil or ts == nil then
+  tokens = capacity
+  ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+else
+  retry_after = math.ceil((1 - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, retry_after}
+"""
+
+
+class RateLimitMiddleware:
+    """Per-client token bucket shared across workers through Redis.
+
+    Fails open: if Redis is unreachable or slower than REDIS_TIMEOUT_SECONDS
+    the request is served and a warning is logged, so a cache outage never
+    takes the API down. ``exempt_paths``
+    (and anything below them) bypass the limiter, so platform health checks
+    never spend a client's budget.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        redis_url: str,
+        capacity: int = 60,
+        refill_per_second: float = 1.0,
+        key_prefix: str = "ratelimit",
+        exempt_paths: Iterable[str] = ("/health",),
+        trust_forwarded_for: bool = False,
+    ) -> None:
+        self.app = app
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.key_prefix = key_prefix
+        self.exempt_paths = tuple(exempt_paths)
+        self.trust_forwarded_for = trust_forwarded_for
+        self._redis = redis.from_url(
+            redis_url,
+            socket_connect_timeout=REDIS_TIMEOUT_SECONDS,
+            socket_timeout=REDIS_TIMEOUT_SECONDS,
+        )
+        self._script = self._redis.register_script(TOKEN_BUCKET_LUA)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._is_exempt(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = await self._consume(self._client_key(scope))
+        if retry_after is None:
+            await self.app(scope, receive, send)
+            return
+
+        response = error_response(
+            RateLimitError(retry_after=retry_after),
+            headers={"Retry-After": str(retry_after)},
+        )
+        await response(scope, receive, send)
+
+    def _is_exempt(self, path: str) -> bool:
+        return any(path == prefix or path.startswith(prefix + "/") for prefix in self.exempt_paths)
+
+    def _client_key(self, scope: Scope) -> str:
+        """
+        Bucket per client IP. With ``trust_forwarded_for`` (behind Render's
+        load balancer) that is the rightmost X-Forwarded-For entry: the one
+        the proxy appended itself. Entries to its left come from the client
+        and are never trusted. Otherwise the socket peer is used.
+        """
+        host = None
+        if self.trust_forwarded_for:
+            forwarded = b",".join(
+                value for name, value in scope["headers"] if name == b"x-forwarded-for"
+            )
+            host = forwarded.rsplit(b",", 1)[-1].strip().decode("latin-1") or None
+        if host is None:
+            client = scope.get("client")
+            host = client[0] if client else "unknown"
+        return f"{self.key_prefix}:{host}"
+
+    async def _consume(self, key: str) -> Optional[int]:
+        """Take one token; return None if allowed, else seconds until retry."""
+        try:
+            allowed, retry_after = await self._script(
+                keys=[key], args=[self.capacity, self.refill_per_second]
+            )
+        except redis.RedisError as exc:
+            logger.warning("Rate limiter unavailable, allowing request: %s", exc)
+            return None
+        if allowed:
+            return None
+        return max(int(retry_after), 1)
@@ -0,0 +1,141 @@
+"""
+In-memory frontend assets, served ahead of the application middleware stack.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mimetypes
+import os
+from typing import Dict, Mapping, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# URL path -> (body, content type, ETag, gzip body or None, gzip ETag or None)
+AssetCache = Dict[str, Tuple[bytes, str, str, Optional[bytes], Optional[str]]]
+
+GZIP_MIN_SIZE = 500
+
+
+def load_assets(directory: str, aliases: Mapping[str, str]) -> AssetCache:
+    """
+    Read every file under ``directory`` into memory, keyed as ``/static/<path>``.
+    ``aliases`` maps extra URL paths (e.g. ``/``) to files in the directory.
+    Bodies are gzip-compressed once here so requests never compress them; the
+    gzip copy is a separate representation and gets its own ETag.
+    """
+    assets: AssetCache = {}
+    for root, _dirs, files in os.walk(directory):
+        for name in files:
+            file_path = os.path.join(root, name)
+            with open(file_path, "rb") as asset:
+                body = asset.read()
+            content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            etag = f'"{hashlib.md5(body, usedforsecurity=False).hexdigest()}"'
+            gzip_body = gzip_etag = None
+            if len(body) >= GZIP_MIN_SIZE:
+                compressed = gzip.compress(body, compresslevel=9, mtime=0)
+                if len(compressed) < len(body):
+                    gzip_body = compressed
+                    gzip_etag = f'{etag[:-1]}-gzip"'
+            rel_path = os.path.relpath(file_path, directory).replace(os.sep, "/")
+            assets[f"/static/{rel_path}"] = (body, content_type, etag, gzip_body, gzip_etag)
+    for url_path, file_path in aliases.items():
+        rel_path = os.path.relpath(file_path, directory).replace(os.sep, "/")
+        entry = assets.get(f"/static/{rel_path}")
+        if entry is not None:
+            assets[url_path] = entry
+    return assets
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """True if Accept-Encoding allows gzip, honoring q-values (``gzip;q=0``)."""
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, *params = item.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    if "gzip" in qualities:
+        return qualities["gzip"] > 0
+    return qualities.get("*", 0.0) > 0
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak If-None-Match comparison: ``*``, lists and ``W/`` tags."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def asset_response(
+    assets: AssetCache,
+    url_path: str,
+    request_headers: Headers,
+) -> Optional[Response]:
+    """
+    Build a response for a cached asset, honoring If-None-Match.
+    The precompressed copy is chosen from Accept-Encoding; since it sets
+    Content-Encoding, GZipMiddleware leaves route-served assets alone.
+    """
+    entry = assets.get(url_path)
+    if entry is None:
+        return None
+    body, content_type, etag, gzip_body, gzip_etag = entry
+    # Asset URLs aren't versioned, so browsers must revalidate (cheap 304)
+    # rather than keep stale JS/CSS beside a freshly deployed index.html.
+    headers = {"Cache-Control": "no-cache"}
+    if gzip_body is not None:
+        headers["Vary"] = "Accept-Encoding"
+        if _accepts_gzip(request_headers.get("accept-encoding", "")):
+            body, etag = gzip_body, gzip_etag
+            headers["Content-Encoding"] = "gzip"
+    headers["ETag"] = etag
+    if _etag_matches(request_headers.get("if-none-match"), etag):
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=content_type, headers=headers)
+
+
+class StaticAssetMiddleware:
+    """Answer GET/HEAD for cached assets before rate limiting, logging and CORS.
+
+    Wraps the whole application, so static hits skip the middleware stack
+    entirely. Paths missing from the cache fall through to the app.
+    """
+
+    def __init__(self, app: ASGIApp, assets: AssetCache) -> None:
+        self.app = app
+        self.assets = assets
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] == "http"
+            and scope["path"] in self.assets
+            and scope["method"] in ("GET", "HEAD")
+        ):
+            response = asset_response(self.assets, scope["path"], Headers(scope=scope))
+            if response is not None:
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
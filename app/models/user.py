@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, DateTime, Index, Integer, String
 from sqlalchemy.sql import func
 from app.db import Base
 
@@ -13,4 +13,9 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Backs case-insensitive lookups in auth_service.get_user_by_email
+        Index("users_email_lower_idx", func.lower(email)),
+    )
+
 
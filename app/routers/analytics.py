@@ -8,17 +8,17 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.db import get_db
 from app.services.feedback_service import FeedbackService
 from app.deps import require_role
+from app.logging_config import get_logger
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
+logger = get_logger(__name__)
 
 
-@router.get("/summary", dependencies=[Depends(require_role("admin", "staff"))])
+@router.get("/summary", response_model=dict, dependencies=[Depends(require_role("admin", "staff"))])
 async def get_analytics_summary(
     db: AsyncSession = Depends(get_db)
 ):
     """Get analytics summary"""
-    from app.logging_config import get_logger
-    logger = get_logger(__name__)
     logger.info("Fetching analytics summary")
     try:
         summary = await FeedbackService.get_analytics_summary(db)
@@ -36,14 +36,12 @@ async def get_analytics_summary(
         }
 
 
-@router.get("/trends", dependencies=[Depends(require_role("admin", "staff"))])
+@router.get("/trends", response_model=dict, dependencies=[Depends(require_role("admin", "staff"))])
 async def get_analytics_trends(
     days: int = Query(30, ge=1, le=365, description="Number of days for trends"),
     db: AsyncSession = Depends(get_db)
 ):
     """Get analytics trends"""
-    from app.logging_config import get_logger
-    logger = get_logger(__name__)
     logger.info(f"Fetching analytics trends for {days} days")
     try:
         trends = await FeedbackService.get_analytics_trends(db, days=days)
@@ -1,23 +1,24 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, EmailStr, Field
 from sqlalchemy.ext.asyncio import AsyncSession
-from jose import jwt, JWTError
 
 from app.db import get_db
 from app.services.auth_service import (
     create_user,
     get_user_by_email,
-    verify_password,
+    get_user_auth_row,
+    update_password_hash,
+    ahash_password,
+    averify_password,
+    password_needs_rehash,
     create_access_token,
     create_refresh_token,
-    get_secret_key,
     get_user_count,
 )
 from app.models.user import User
 from app.deps import get_current_user, get_current_user_optional
 from app.logging_config import get_logger
-from sqlalchemy import select
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -44,7 +45,6 @@ class TokenResponse(BaseModel):
 
 @router.post("/register", response_model=dict, status_code=201)
 async def register(
-    request: Request,
     payload: RegisterRequest,
     db: AsyncSession = Depends(get_db),
     current_user: User | None = Depends(get_current_user_optional)
@@ -65,22 +65,14 @@ async def register(
 
 @router.post("/login", response_model=TokenResponse)
 async def login(
-    request: Request,
     payload: LoginRequest,
     db: AsyncSession = Depends(get_db)
 ):
     logger.info(f"Login attempt for email: {payload.email}")
     
     # Check if user exists (case-insensitive email match)
-    user = await get_user_by_email(db, payload.email)
+    user = await get_user_auth_row(db, payload.email)
     if not user:
-        # Log all users for debugging (only in development)
-        import os
-        if os.getenv("ENVIRONMENT", "production").lower() == "development":
-            all_users = await db.execute(select(User))
-            users_list = all_users.scalars().all()
-            logger.debug(f"Available users in database: {[u.email for u in users_list]}")
-        
         logger.warning(f"Login failed: User not found for email: {payload.email}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, 
@@ -89,7 +81,7 @@ async def login(
     
     # Verify password
     try:
-        password_valid = verify_password(payload.password, user.password_hash)
+        password_valid = await averify_password(payload.password, user.password_hash)
     except Exception as e:
         logger.error(f"Password verification error for {payload.email}: {e}")
         raise HTTPException(
@@ -104,16 +96,21 @@ async def login(
             detail="Invalid credentials"
         )
     
+    if password_needs_rehash(user.password_hash):
+        # Transparently upgrade legacy bcrypt (or outdated argon2) hashes
+        try:
+            await update_password_hash(db, user.id, await ahash_password(payload.password))
+            logger.info(f"Password hash upgraded for user: {user.email}")
+        except Exception as e:
+            # Not fatal: the session is rolled back on close and login proceeds
+            logger.error(f"Password hash upgrade failed for {payload.email}: {e}")
+
     logger.info(f"Login successful for user: {user.email} (role: {user.role})")
     access_token = create_access_token({"sub": str(user.id), "email": user.email, "role": user.role})
     refresh_token = create_refresh_token({"sub": str(user.id)})
     return TokenResponse(access_token=access_token, refresh_token=refresh_token, role=user.role)
 
 
-def decode_token(token: str) -> dict:
-    return jwt.decode(token, get_secret_key(), algorithms=["HS256"])
-
-
 @router.post("/bootstrap-admin", response_model=dict, status_code=201)
 async def bootstrap_admin(db: AsyncSession = Depends(get_db)):
     """
@@ -147,14 +144,10 @@ async def bootstrap_admin(db: AsyncSession = Depends(get_db)):
     # Check if any users exist
     total = await get_user_count(db)
     if total > 0:
-        # List all users for debugging
-        all_users_result = await db.execute(select(User))
-        all_users = all_users_result.scalars().all()
-        user_emails = [u.email for u in all_users]
-        logger.warning(f"Users already exist ({total}): {user_emails}. Cannot bootstrap admin.")
+        logger.warning(f"Users already exist ({total}). Cannot bootstrap admin.")
         raise HTTPException(
             status_code=400,
-            detail=f"Users already exist ({total}). Cannot bootstrap admin. Existing users: {', '.join(user_emails)}"
+            detail=f"Users already exist ({total}). Cannot bootstrap admin."
         )
     
     # Create admin user
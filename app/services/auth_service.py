@@ -1,12 +1,22 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional, Tuple
+import asyncio
+import base64
+import hashlib
+import hmac
 import os
 import secrets
+import time
 
 import bcrypt
-from jose import jwt
+import orjson
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import Row, literal, select, func, update
+from sqlalchemy.exc import IntegrityError
 
 from app.models.user import User
 from app.logging_config import get_logger
@@ -16,22 +26,55 @@ logger = get_logger(__name__)
 JWT_ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 REFRESH_TOKEN_EXPIRE_DAYS = 7
+_ACCESS_TD = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+_REFRESH_TD = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
 
+class TokenError(Exception):
+    """Raised when a JWT is malformed, wrongly signed, or expired."""
 
+
+ARGON2_PREFIX = "$argon2"
+# argon2id cost, tunable per deployment (defaults: OWASP baseline). Changing
+# these makes password_needs_rehash() upgrade stored hashes on next login.
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "2"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "19456"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "1"))
+if not 1 <= ARGON2_TIME_COST <= 10:
+    raise RuntimeError("ARGON2_TIME_COST must be between 1 and 10.")
+if not 1 <= ARGON2_PARALLELISM <= 16:
+    raise RuntimeError("ARGON2_PARALLELISM must be between 1 and 16.")
+if not 8 * ARGON2_PARALLELISM <= ARGON2_MEMORY_COST <= 1048576:
+    raise RuntimeError("ARGON2_MEMORY_COST must be between 8 * ARGON2_PARALLELISM and 1048576 KiB.")
+_password_hasher = PasswordHasher(
+    time_cost=ARGON2_TIME_COST,
+    memory_cost=ARGON2_MEMORY_COST,
+    parallelism=ARGON2_PARALLELISM,
+)
+
+# Placeholder values copied from docs/examples that must never sign tokens.
+_INSECURE_KEYS = frozenset({
+    "change-this-in-production",
+    "secret",
+    "dev",
+    "test",
+    "your-secret-key-here",
+})
+
+
+@lru_cache(maxsize=1)
 def get_secret_key() -> str:
+    """
+    Return the validated SECRET_KEY.
+    Cached after the first successful call; failures are not cached, so a
+    missing or insecure key keeps raising.
+    """
     secret_key = os.getenv("SECRET_KEY")
     if not secret_key:
         raise RuntimeError(
             "SECRET_KEY environment variable is not set. "
             "Generate one with: python -c \"import secrets; print(secrets.token_urlsafe(64))\""
         )
-    if secret_key in {
-        "change-this-in-production",
-        "secret",
-        "dev",
-        "test",
-        "your-secret-key-here",
-    }:
+    if secret_key in _INSECURE_KEYS:
         raise RuntimeError("SECRET_KEY uses a known insecure placeholder. Please set a secure value.")
     if len(secret_key) < 32:
         raise RuntimeError("SECRET_KEY must be at least 32 characters long.")
@@ -46,68 +89,170 @@ def generate_secret_key() -> str:
 
 def hash_password(password: str) -> str:
     """
-    Hash password using bcrypt with 12 rounds.
-    Uses bcrypt directly for standard password hashing.
-    No pre-hashing needed - bcrypt handles passwords up to 72 bytes natively.
+    Hash password using argon2id.
+    Cost comes from ARGON2_TIME_COST / ARGON2_MEMORY_COST / ARGON2_PARALLELISM.
     """
     if not isinstance(password, str):
         password = str(password)
-    
-    password_bytes = password.encode('utf-8')
-    
-    # Truncate to 72 bytes if needed (bcrypt hard limit)
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-        logger.warning("Password truncated to 72 bytes (bcrypt limit)")
-    
-    # Generate salt and hash with 12 rounds (default: 12, good balance)
-    salt = bcrypt.gensalt(rounds=12)
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
+    return _password_hasher.hash(password)
 
 
 def verify_password(password: str, password_hash: str) -> bool:
     """
-    Verify password against bcrypt hash.
-    Handles passwords up to 72 bytes without pre-hashing.
+    Verify password against an argon2id hash, or a legacy bcrypt hash.
+    Legacy bcrypt hashes are limited to the first 72 bytes of the password.
     """
     if not isinstance(password, str):
         password = str(password)
-    
+
     try:
-        password_bytes = password.encode('utf-8')
-        
-        # Truncate to 72 bytes if needed (bcrypt hard limit)
-        if len(password_bytes) > 72:
-            password_bytes = password_bytes[:72]
-            logger.warning("Password truncated to 72 bytes for verification (bcrypt limit)")
-        
-        password_hash_bytes = password_hash.encode('utf-8')
-        return bcrypt.checkpw(password_bytes, password_hash_bytes)
+        if password_hash.startswith(ARGON2_PREFIX):
+            return _password_hasher.verify(password_hash, password)
+
+        # bcrypt only uses the first 72 bytes; slicing is a no-op for shorter input
+        return bcrypt.checkpw(password.encode('utf-8')[:72], password_hash.encode('utf-8'))
+    except VerificationError:
+        return False
     except Exception as e:
-        logger.error(f"Password verification failed: {e}")
+        # Malformed hash etc.; lazy %-formatting and no traceback on the login path
+        logger.warning("Password verification failed: %s", e)
         return False
 
 
+async def ahash_password(password: str) -> str:
+    """hash_password in a worker thread, so the CPU-bound hash doesn't block the event loop."""
+    return await asyncio.to_thread(hash_password, password)
+
+
+async def averify_password(password: str, password_hash: str) -> bool:
+    """verify_password in a worker thread, so the CPU-bound check doesn't block the event loop."""
+    return await asyncio.to_thread(verify_password, password, password_hash)
+
+
+def password_needs_rehash(password_hash: str) -> bool:
+    """True for legacy bcrypt hashes or argon2 hashes with outdated parameters."""
+    if not password_hash.startswith(ARGON2_PREFIX):
+        return True
+    try:
+        return _password_hasher.check_needs_rehash(password_hash)
+    except InvalidHashError:
+        return True
+
+
+def _b64url_encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+# The header never changes, so its encoded segment is built once
+_HEADER_B64 = _b64url_encode(b'{"alg":"HS256","typ":"JWT"}')
+
+
+@lru_cache(maxsize=1)
+def _get_key_bytes() -> bytes:
+    """SECRET_KEY as HMAC key bytes, encoded once after validation succeeds."""
+    return get_secret_key().encode("utf-8")
+
+
+def _encode_token(claims: dict) -> str:
+    """
+    Sign claims as an HS256 JWT using hmac/hashlib directly (OpenSSL-backed,
+    SHA-NI where available), with no JWT library dispatch in between.
+    """
+    # orjson emits compact UTF-8 bytes directly; exp is already an int
+    payload_b64 = _b64url_encode(orjson.dumps(claims))
+    signing_input = f"{_HEADER_B64}.{payload_b64}"
+    signature = hmac.new(_get_key_bytes(), signing_input.encode("ascii"), hashlib.sha256).digest()
+    return f"{signing_input}.{_b64url_encode(signature)}"
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, get_secret_key(), algorithm=JWT_ALGORITHM)
-    return encoded_jwt
+    expire = datetime.now(timezone.utc) + (expires_delta or _ACCESS_TD)
+    to_encode.update({"exp": int(expire.timestamp()), "type": "access"})
+    return _encode_token(to_encode)
 
 
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
-    to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, get_secret_key(), algorithm=JWT_ALGORITHM)
-    return encoded_jwt
+    expire = datetime.now(timezone.utc) + (expires_delta or _REFRESH_TD)
+    to_encode.update({"exp": int(expire.timestamp()), "type": "refresh"})
+    return _encode_token(to_encode)
+
+
+def decode_token(token: str) -> dict:
+    """
+    Verify an HS256 JWT and return its claims.
+    Specialized for the single algorithm we issue: one HMAC-SHA256 and a
+    constant-time compare, instead of a JWT library's generic dispatch.
+    Raises TokenError on any failure.
+    """
+    try:
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        if header_b64 != _HEADER_B64:
+            # Not our canonical header; parse it to check the algorithm
+            header = orjson.loads(_b64url_decode(header_b64))
+            if not isinstance(header, dict) or header.get("alg") != JWT_ALGORITHM:
+                raise TokenError("Unsupported token algorithm")
+        signing_input = f"{header_b64}.{payload_b64}".encode("ascii")
+        expected = hmac.new(_get_key_bytes(), signing_input, hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64url_decode(signature_b64)):
+            raise TokenError("Signature verification failed")
+        payload = orjson.loads(_b64url_decode(payload_b64))
+    except ValueError as exc:
+        raise TokenError("Malformed token") from exc
+    if not isinstance(payload, dict):
+        raise TokenError("Malformed token payload")
+
+    now = time.time()
+    for claim in ("exp", "iat", "nbf"):
+        value = payload.get(claim)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise TokenError(f"Invalid {claim} claim")
+    if payload.get("exp") is not None and payload["exp"] <= now:
+        raise TokenError("Token has expired")
+    if payload.get("nbf") is not None and payload["nbf"] > now:
+        raise TokenError("Token not yet valid")
+    return payload
 
 
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
-    result = await db.execute(select(User).where(User.email == email))
-    return result.scalar_one_or_none()
+    """
+    Case-insensitive lookup, served by the users_email_lower_idx index.
+    LIMIT 1: lower(email) isn't unique, so legacy rows differing only in case
+    must not raise MultipleResultsFound. Those are ordered exact match first,
+    then lowest id, so the same account always answers.
+    """
+    result = await db.execute(
+        select(User)
+        .where(func.lower(User.email) == email.lower())
+        .order_by(User.email != email, User.id)
+        .limit(1)
+    )
+    return result.scalars().first()
+
+
+async def get_user_auth_row(db: AsyncSession, email: str) -> Optional[Row]:
+    """
+    Fetch only the columns login needs (id, email, password_hash, role) as a
+    plain Row, skipping ORM hydration and identity-map bookkeeping. Resolves
+    case-only duplicates in the same order as get_user_by_email.
+    """
+    result = await db.execute(
+        select(User.id, User.email, User.password_hash, User.role)
+        .where(func.lower(User.email) == email.lower())
+        .order_by(User.email != email, User.id)
+        .limit(1)
+    )
+    return result.first()
+
+
+async def update_password_hash(db: AsyncSession, user_id: int, password_hash: str) -> None:
+    await db.execute(update(User).where(User.id == user_id).values(password_hash=password_hash))
+    await db.commit()
 
 
 async def get_user_count(db: AsyncSession) -> int:
@@ -116,16 +261,52 @@ async def get_user_count(db: AsyncSession) -> int:
 
 
 async def create_user(db: AsyncSession, email: str, password: str, role: str = "staff") -> Tuple[Optional[User], Optional[str]]:
-    existing = await get_user_by_email(db, email)
-    if existing:
+    exists_q = select(literal(1)).where(func.lower(User.email) == email.lower()).limit(1)
+    if (await db.execute(exists_q)).scalar() is not None:
         return None, "User already exists"
-    user = User(email=email, password_hash=hash_password(password), role=role)
+    user = User(email=email, password_hash=await ahash_password(password), role=role)
     db.add(user)
-    await db.commit()
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent insert of the same email
+        await db.rollback()
+        return None, "User already exists"
     await db.refresh(user)
     return user, None
 
 
+def _insert(db: AsyncSession):
+    """Dialect insert() for the bound engine, which carries ON CONFLICT support."""
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+
+async def upsert_user(db: AsyncSession, email: str, password: str, role: str = "admin") -> User:
+    """
+    Overwrite password_hash/role of an existing user, or insert the user.
+    The existing row is resolved case-insensitively through get_user_by_email,
+    like every other lookup, so a reset never adds a row that differs only in
+    case. The insert keeps ON CONFLICT (email) DO UPDATE for a concurrent
+    insert of the same address.
+    """
+    password_hash = await ahash_password(password)
+    user = await get_user_by_email(db, email)
+    if user is not None:
+        # Flushed as UPDATE users ... WHERE id = :id
+        user.password_hash = password_hash
+        user.role = role
+    else:
+        stmt = _insert(db)(User).values(email=email, password_hash=password_hash, role=role)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[User.email],
+            set_={"password_hash": stmt.excluded.password_hash, "role": stmt.excluded.role},
+        ).returning(User)
+        result = await db.execute(stmt, execution_options={"populate_existing": True})
+        user = result.scalar_one()
+    await db.commit()
+    return user
+
+
 async def ensure_admin_user(db: AsyncSession, email: Optional[str], password: Optional[str]) -> None:
     """
     Create an admin user if none exists and env ADMIN_EMAIL/ADMIN_PASSWORD provided.
@@ -174,17 +355,20 @@ async def ensure_or_update_admin_user(
         logger.info(f"Admin user already exists: {email} (ID: {existing_user.id})")
         return existing_user, "existing"
     else:
-        # User doesn't exist - CREATE
+        # User doesn't exist - CREATE. DO NOTHING on conflict, so a worker
+        # booting concurrently never overwrites the row another one inserted.
         logger.info(f"Creating admin user: {email}")
-        new_user = User(
-            email=email,
-            password_hash=hash_password(password),
-            role=role
+        stmt = _insert(db)(User).values(
+            email=email, password_hash=await ahash_password(password), role=role
         )
-        db.add(new_user)
+        stmt = stmt.on_conflict_do_nothing(index_elements=[User.email]).returning(User.id)
+        inserted_id = (await db.execute(stmt)).scalar_one_or_none()
         await db.commit()
-        await db.refresh(new_user)
-        logger.info(f"Admin user created: {email} (ID: {new_user.id})")
-        return new_user, "created"
+        user = await get_user_by_email(db, email)
+        if inserted_id is None:
+            logger.info(f"Admin user created concurrently: {email} (ID: {user.id})")
+            return user, "existing"
+        logger.info(f"Admin user created: {email} (ID: {user.id})")
+        return user, "created"
 
 
@@ -6,12 +6,11 @@ from __future__ import annotations
 from typing import Dict
 
 import socketio
-from jose import JWTError, jwt
 
 from app.logging_config import get_logger
 from app.models.analysis import Analysis
 from app.models.feedback import Feedback
-from app.services.auth_service import get_secret_key
+from app.services.auth_service import TokenError, decode_token
 
 logger = get_logger(__name__)
 
@@ -35,7 +34,7 @@ async def connect(sid, environ, auth):
     token = _extract_token(auth)
     try:
         if token:
-            payload = jwt.decode(token, get_secret_key(), algorithms=["HS256"])
+            payload = decode_token(token)
             role = payload.get("role")
             if role in ("admin", "staff"):
                 await sio.enter_room(sid, STAFF_ROOM)
@@ -43,7 +42,7 @@ async def connect(sid, environ, auth):
                 logger.info("Socket connected: %s role=%s", sid, role)
                 await sio.emit("connected", {"message": "Connected to staff updates"}, room=sid)
                 return
-    except JWTError:
+    except TokenError:
         logger.warning("Invalid Socket.IO token for %s", sid)
     await sio.disconnect(sid)
 
@@ -60,6 +60,15 @@ class RateLimitError(APIError):
         )
 
 
+def error_response(exc: APIError, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    """Render an APIError in the API's standard error envelope."""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"error": {"code": exc.code, "message": exc.message, "details": exc.details}},
+        headers=headers,
+    )
+
+
 async def api_error_handler(request: Request, exc: APIError) -> JSONResponse:
     logger.error(
         "API error: %s %s",
@@ -67,10 +76,7 @@ async def api_error_handler(request: Request, exc: APIError) -> JSONResponse:
         exc.message,
         extra={"path": request.url.path, "status": exc.status_code},
     )
-    return JSONResponse(
-        status_code=exc.status_code,
-        content={"error": {"code": exc.code, "message": exc.message, "details": exc.details}},
-    )
+    return error_response(exc)
 
 
 async def generic_error_handler(request: Request, exc: Exception) -> JSONResponse:
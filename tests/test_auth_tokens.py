@@ -0,0 +1,114 @@
+"""
+Checks for the hand-written HS256 signer/verifier in app.services.auth_service.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import time
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+import orjson
+
+from app.services import auth_service
+from app.services.auth_service import (
+    TokenError,
+    create_access_token,
+    create_refresh_token,
+    decode_token,
+)
+
+SECRET_KEY = "k" * 48
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _sign(header: dict, payload: bytes, key: str = SECRET_KEY) -> str:
+    """Build a correctly signed token with an arbitrary header and payload."""
+    signing_input = f"{_b64(orjson.dumps(header))}.{_b64(payload)}"
+    signature = hmac.new(key.encode("utf-8"), signing_input.encode("ascii"), hashlib.sha256).digest()
+    return f"{signing_input}.{_b64(signature)}"
+
+
+class TokenTests(unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.dict(os.environ, {"SECRET_KEY": SECRET_KEY})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self._clear_key_caches()
+        self.addCleanup(self._clear_key_caches)
+
+    @staticmethod
+    def _clear_key_caches() -> None:
+        auth_service.get_secret_key.cache_clear()
+        auth_service._get_key_bytes.cache_clear()
+
+    def assertRejected(self, token: str) -> None:
+        with self.assertRaises(TokenError):
+            decode_token(token)
+
+    def test_round_trip(self) -> None:
+        access = decode_token(create_access_token({"sub": "1", "role": "admin"}))
+        self.assertEqual((access["sub"], access["role"], access["type"]), ("1", "admin", "access"))
+        self.assertIsInstance(access["exp"], int)
+        self.assertGreater(access["exp"], time.time())
+        self.assertEqual(decode_token(create_refresh_token({"sub": "1"}))["type"], "refresh")
+
+    def test_accepts_equivalent_hs256_header(self) -> None:
+        token = _sign({"typ": "JWT", "alg": "HS256"}, orjson.dumps({"sub": "1"}))
+        self.assertEqual(decode_token(token), {"sub": "1"})
+
+    def test_rejects_tampered_payload(self) -> None:
+        header, _payload, signature = create_access_token({"sub": "1", "role": "staff"}).split(".")
+        forged = _b64(orjson.dumps({"sub": "1", "role": "admin", "exp": int(time.time()) + 60}))
+        self.assertRejected(f"{header}.{forged}.{signature}")
+
+    def test_rejects_tampered_signature(self) -> None:
+        signing_input, signature = create_access_token({"sub": "1"}).rsplit(".", 1)
+        # Flip the first character: the last one partly encodes padding bits
+        flipped = "A" if signature[0] != "A" else "B"
+        self.assertRejected(f"{signing_input}.{flipped}{signature[1:]}")
+
+    def test_rejects_other_key(self) -> None:
+        self.assertRejected(_sign({"alg": "HS256", "typ": "JWT"}, orjson.dumps({"sub": "1"}), key="x" * 48))
+
+    def test_rejects_truncated(self) -> None:
+        token = create_access_token({"sub": "1"})
+        for broken in ("", token.rsplit(".", 1)[0], token[:-5], token + ".extra", "not-a-token"):
+            with self.subTest(token=broken):
+                self.assertRejected(broken)
+
+    def test_rejects_expired(self) -> None:
+        self.assertRejected(create_access_token({"sub": "1"}, expires_delta=timedelta(seconds=-1)))
+
+    def test_rejects_future_nbf(self) -> None:
+        self.assertRejected(_sign({"alg": "HS256"}, orjson.dumps({"sub": "1", "nbf": time.time() + 60})))
+
+    def test_rejects_other_algorithms(self) -> None:
+        payload = orjson.dumps({"sub": "1", "exp": int(time.time()) + 60})
+        unsigned = f"{_b64(orjson.dumps({'alg': 'none', 'typ': 'JWT'}))}.{_b64(payload)}."
+        self.assertRejected(unsigned)
+        # Even with a valid HMAC-SHA256, anything not declared HS256 is refused
+        for alg in ("none", "HS512", "RS256", None):
+            with self.subTest(alg=alg):
+                self.assertRejected(_sign({"alg": alg, "typ": "JWT"}, payload))
+        self.assertRejected(_sign(["HS256"], payload))
+
+    def test_rejects_non_dict_payload(self) -> None:
+        for payload in (b"[1, 2]", b'"sub"', b"42", b"null", b"{not json"):
+            with self.subTest(payload=payload):
+                self.assertRejected(_sign({"alg": "HS256", "typ": "JWT"}, payload))
+
+    def test_rejects_non_numeric_time_claims(self) -> None:
+        for claim in ("exp", "iat", "nbf"):
+            for value in ("9999999999", True, [1], {"t": 1}):
+                with self.subTest(claim=claim, value=value):
+                    self.assertRejected(_sign({"alg": "HS256"}, orjson.dumps({"sub": "1", claim: value})))
+
+
+if __name__ == "__main__":
+    unittest.main()